@@ -1,42 +1,74 @@
 
 import os
 import asyncio
+import time
 import datetime as dt
-from typing import Dict, Any
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
 
+import aiohttp
 import discord
-from discord.ext import tasks, commands
+import orjson
+from discord import app_commands
+from discord.utils import utcnow
 
-# Timezone setup for London
-try:
-    from zoneinfo import ZoneInfo  # Python 3.9+
-    LONDON_TZ = ZoneInfo("Europe/London")
-except ImportError:
-    import pytz
-    LONDON_TZ = pytz.timezone("Europe/London")
+# Timezone setup (defaults to London)
+TZ = ZoneInfo(os.getenv("BOT_TZ", "Europe/London"))
+
+# "edge": remind once when a channel goes quiet
+# "hourly": remind on the hour for as long as it stays quiet
+REMINDER_MODE = os.getenv("REMINDER_MODE", "edge")
+if REMINDER_MODE not in ("edge", "hourly"):
+    raise RuntimeError("REMINDER_MODE must be 'edge' or 'hourly'.")
 
 # --- Tiny HTTP server to keep Render Free alive ---
-from aiohttp import web
+def http_response(body: bytes, head: bool = False) -> bytes:
+    headers = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        b"Connection: close\r\n\r\n"
+    )
+    # HEAD responses carry the same headers but no body
+    return headers if head else headers + body
+
+# /health is what Render probes, so its responses are built once
+HEALTH_BODY = orjson.dumps({"ok": True})
+HEALTH_RESPONSE = http_response(HEALTH_BODY)
+HEALTH_HEAD_RESPONSE = http_response(HEALTH_BODY, head=True)
 
 async def start_http_server():
-    async def health(_):
-        return web.json_response({"ok": True, "time": dt.datetime.now(LONDON_TZ).isoformat()})
+    get_now, tz = dt.datetime.now, TZ
 
-    app = web.Application()
-    app.router.add_get("/", health)
-    app.router.add_get("/health", health)
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+            method, _, rest = head.partition(b" ")
+            path = rest.split(b" ", 1)[0].partition(b"?")[0]
+            is_head = method == b"HEAD"
+            if path == b"/":
+                body = orjson.dumps({"ok": True, "time": get_now(tz)})
+                writer.write(http_response(body, head=is_head))
+            else:
+                writer.write(HEALTH_HEAD_RESPONSE if is_head else HEALTH_RESPONSE)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
 
-    runner = web.AppRunner(app)
-    await runner.setup()
     port = int(os.getenv("PORT", "8000"))
-    site = web.TCPSite(runner, "0.0.0.0", port)
-    await site.start()
+    server = await asyncio.start_server(handle, "0.0.0.0", port)
     print(f"HTTP health server listening on :{port}")
-    return runner
+    return server
 
 # -------- Discord setup --------
-intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Only guild and message-create events are used; skip everything else
+intents = discord.Intents.none()
+intents.guilds = True
+intents.guild_messages = True
+bot = discord.Client(intents=intents)
+tree = app_commands.CommandTree(bot)
 
 # ----- Config -----
 def env_int(name: str, default: str) -> int:
@@ -56,7 +88,67 @@ CONFIG = {
     },
 }
 
-STATE: Dict[int, Dict[str, Any]] = {}
+WATCHED = frozenset(CONFIG)
+# (channel_id, threshold seconds, message) for the reminder hot loop
+SCHEDULE: Tuple[Tuple[int, float, str], ...] = tuple(
+    (cid, cfg["threshold"].total_seconds(), cfg["message"]) for cid, cfg in CONFIG.items()
+)
+
+class ChState:
+    """Per-channel activity state.
+
+    ``last`` is kept in UTC and only used for display; inactivity checks
+    use ``last_mono``. ``reminded_hour`` is the local hour of the last
+    hourly-mode reminder.
+    """
+    __slots__ = ("last", "last_mono", "notified", "reminded_hour")
+
+    def __init__(self, last: dt.datetime, last_mono: float, notified: bool = False):
+        self.last = last
+        self.last_mono = last_mono
+        self.notified = notified
+        self.reminded_hour: Optional[dt.datetime] = None
+
+STATE: Dict[int, ChState] = {}
+CHANNELS: Dict[int, discord.abc.Messageable] = {}
+POLLER: Optional[asyncio.Task] = None
+SYNCED = False
+# Set by on_message so the poller re-arms against the new deadline
+WAKE = asyncio.Event()
+# How far back on_ready looks for a non-bot message when seeding
+SEED_HISTORY_LIMIT = 50
+
+def mono_at(ts: dt.datetime) -> float:
+    """Map a past aware datetime onto the monotonic clock."""
+    age = (utcnow() - ts).total_seconds()
+    return time.monotonic() - max(age, 0.0)
+
+def mark_activity(channel_id: int, ts: dt.datetime, mono: float) -> None:
+    """Record activity in a channel, reusing its state object when present."""
+    st = STATE.get(channel_id)
+    if st is None:
+        STATE[channel_id] = ChState(ts, mono)
+    else:
+        st.last = ts
+        st.last_mono = mono
+        st.notified = False
+
+def seed_activity(channel_id: int, ts: dt.datetime, reminded_at: Optional[dt.datetime] = None) -> None:
+    """Seed a channel from history on (re)connect.
+
+    Existing state is only replaced by a newer message, so a reconnect
+    during a quiet spell doesn't reset ``notified`` and re-send a reminder.
+    ``reminded_at`` is our own reminder posted after ``ts``, if any, so a
+    restart doesn't repeat it either.
+    """
+    st = STATE.get(channel_id)
+    if st is not None and ts <= st.last:
+        return
+    mark_activity(channel_id, ts, mono_at(ts))
+    if reminded_at is not None:
+        st = STATE[channel_id]
+        st.notified = True
+        st.reminded_hour = reminded_at.astimezone(TZ).replace(minute=0, second=0, microsecond=0)
 
 @bot.event
 async def on_ready():
@@ -64,67 +156,184 @@ async def on_ready():
     for channel_id in CONFIG.keys():
         try:
             channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
-            async for msg in channel.history(limit=1):
-                STATE[channel_id] = {"last_message_at": msg.created_at.astimezone(LONDON_TZ)}
-                break
+            CHANNELS[channel_id] = channel
+            # Seed from the newest human post; our own reminders on top of it
+            # mean this quiet spell has already been reported
+            reminded_at = None
+            async for msg in channel.history(limit=SEED_HISTORY_LIMIT):
+                if not msg.author.bot:
+                    seed_activity(channel_id, msg.created_at, reminded_at)
+                    break
+                if reminded_at is None and msg.author.id == bot.user.id:
+                    reminded_at = msg.created_at
             else:
-                STATE[channel_id] = {"last_message_at": dt.datetime.now(LONDON_TZ)}
-            print(f"Seeded channel {channel_id} at {STATE[channel_id]['last_message_at']}")
+                if channel_id not in STATE:
+                    mark_activity(channel_id, utcnow(), time.monotonic())
+            print(f"Seeded channel {channel_id} at {STATE[channel_id].last}")
         except Exception as e:
             print(f"Seed warning for channel {channel_id}: {e}")
-            STATE[channel_id] = {"last_message_at": dt.datetime.now(LONDON_TZ)}
+            if channel_id not in STATE:
+                mark_activity(channel_id, utcnow(), time.monotonic())
 
-    if not check_inactivity.is_running():
-        check_inactivity.start()
+    global POLLER, SYNCED
+    if not SYNCED:
+        try:
+            await tree.sync()
+            SYNCED = True
+        except Exception as e:
+            print(f"Command sync warning: {e}")
+
+    if POLLER is None or POLLER.done():
+        POLLER = asyncio.create_task(poll_inactivity())
+
+@bot.event
+async def on_disconnect():
+    # Cached channel objects may be stale after a reconnect; on_ready refills them
+    CHANNELS.clear()
 
 @bot.event
 async def on_message(message: discord.Message):
-    if message.channel.id in CONFIG and not message.author.bot:
-        STATE[message.channel.id] = {"last_message_at": message.created_at.astimezone(LONDON_TZ)}
-    await bot.process_commands(message)
+    cid = message.channel.id
+    if cid in WATCHED and not message.author.bot:
+        # Inlined mark_activity: this runs for every watched message
+        st = STATE.get(cid)
+        if st is None:
+            STATE[cid] = ChState(message.created_at, time.monotonic())
+        else:
+            st.last = message.created_at
+            st.last_mono = time.monotonic()
+            st.notified = False
+        WAKE.set()
 
-@tasks.loop(minutes=1)
 async def check_inactivity():
-    now = dt.datetime.now(LONDON_TZ)
-    for channel_id, cfg in CONFIG.items():
-        st = STATE.get(channel_id)
-        if not st:
-            STATE[channel_id] = {"last_message_at": now}
+    now = time.monotonic()
+    get_state, get_channel = STATE.get, CHANNELS.get
+    for channel_id, threshold, message in SCHEDULE:
+        st = get_state(channel_id)
+        if st is None:
+            mark_activity(channel_id, utcnow(), now)
             continue
 
-        last = st["last_message_at"]
-        threshold = cfg["threshold"]
+        if now - st.last_mono < threshold:
+            continue
 
-        if (now - last) >= threshold and now.minute == 0:
+        hour = None
+        if REMINDER_MODE == "edge":
+            if st.notified:
+                continue
+        else:
+            # Wakes are deadline-driven, so minute 0 can be checked more than
+            # once; only remind once per local hour
+            wall = dt.datetime.now(TZ)
+            hour = wall.replace(minute=0, second=0, microsecond=0)
+            if wall.minute != 0 or st.reminded_hour == hour:
+                continue
+
+        channel = get_channel(channel_id)
+        if channel is None:
             channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
-            await channel.send(cfg["message"])
+            CHANNELS[channel_id] = channel
+        await channel.send(message)
+        st.notified = True
+        st.reminded_hour = hour
+
+def next_delay() -> float:
+    """Seconds until the earliest channel could need a reminder."""
+    now = time.monotonic()
+    delay = 3600.0
+    for channel_id, threshold, _ in SCHEDULE:
+        st = STATE.get(channel_id)
+        if st is None:
+            continue
+        remaining = st.last_mono + threshold - now
+        if remaining > 0:
+            delay = min(delay, remaining)
+        elif REMINDER_MODE == "hourly":
+            wall = dt.datetime.now(TZ)
+            delay = min(delay, 3600 - (wall.minute * 60 + wall.second + wall.microsecond / 1e6))
+        elif not st.notified:
+            # A previous send failed; retry on the old one-minute cadence
+            delay = min(delay, 60.0)
+    return max(1.0, delay)
 
-@bot.command()
-async def status(ctx: commands.Context):
-    now = dt.datetime.now(LONDON_TZ)
+async def poll_inactivity():
+    # Sleep until the next possible reminder instead of ticking every minute.
+    # A new message only pushes deadlines later, so it just re-arms the wait.
+    while True:
+        try:
+            await check_inactivity()
+        except Exception as e:
+            print(f"Inactivity check warning: {e}")
+        while True:
+            WAKE.clear()
+            try:
+                await asyncio.wait_for(WAKE.wait(), timeout=next_delay())
+            except asyncio.TimeoutError:
+                break
+
+def hms(td: dt.timedelta) -> str:
+    """Format a timedelta as H:MM:SS, dropping microseconds and clamping at zero."""
+    s = max(int(td.total_seconds()), 0)
+    return f"{s // 3600:d}:{(s // 60) % 60:02d}:{s % 60:02d}"
+
+@tree.command(description="Show time since the last post in each watched channel.")
+async def status(interaction: discord.Interaction):
+    now = utcnow()
     lines = []
     for channel_id, cfg in CONFIG.items():
-        st = STATE.get(channel_id, {})
-        last = st.get("last_message_at")
-        if last:
-            elapsed = now - last
+        st = STATE.get(channel_id)
+        if st is not None:
+            last = st.last.astimezone(TZ)
+            elapsed = now - st.last
             remaining = cfg["threshold"] - elapsed
             lines.append(
-                f"<#{channel_id}> — last: {last:%Y-%m-%d %H:%M:%S} London time, "
-                f"elapsed: {str(elapsed).split('.')[0]}, "
-                f"until next reminder: {str(max(remaining, dt.timedelta(0))).split('.')[0]}"
+                f"<#{channel_id}> — last: {last:%Y-%m-%d %H:%M:%S %Z}, "
+                f"elapsed: {hms(elapsed)}, "
+                f"until next reminder: {hms(remaining)}"
             )
         else:
             lines.append(f"<#{channel_id}> — last: unknown")
-    await ctx.send("\n".join(lines))
+    await interaction.response.send_message("\n".join(lines))
 
 # ---------- Entry point ----------
 async def main():
-    await start_http_server()
+    # Run tasks that finish without suspending inline (Python 3.12+)
+    if hasattr(asyncio, "eager_task_factory"):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
     token = os.getenv("DISCORD_BOT_TOKEN") or os.getenv("TOKEN")
     if not token:
         raise RuntimeError("Set DISCORD_BOT_TOKEN (or TOKEN) in your environment.")
-    await bot.start(token)
+    server = await start_http_server()
+    # Shared session for any outbound HTTP beyond discord.py's own client
+    bot.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+
+    async def run_bot():
+        try:
+            await bot.start(token)
+        finally:
+            if not bot.is_closed():
+                await bot.close()
+            # Stops serve_forever() so the task group can exit
+            server.close()
+
+    try:
+        # If either side fails, the other is cancelled and the port is released
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(server.serve_forever())
+            tg.create_task(run_bot())
+    except BaseExceptionGroup as eg:
+        # Surface a lone startup error (e.g. LoginFailure) without the group wrapper
+        if len(eg.exceptions) == 1:
+            raise eg.exceptions[0] from None
+        raise
+    finally:
+        await bot.session.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is a faster drop-in event loop; not available on Windows
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())